@@ -0,0 +1,447 @@
+"""
+Shared building blocks of the Powerlytics pipelines (src.preprocess and src.powerlytics).
+
+- CSV loading and cleaning, whole-file or in chunks
+- Parquet and in-process result caches
+- Hourly summation kernels and run reductions used by every aggregation level
+"""
+
+import csv
+import hashlib
+import os
+import stat
+import tempfile
+from itertools import islice
+import pandas as pd
+from typing import Dict, Iterator, Optional, Tuple
+import numpy as np
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+except ImportError:
+    pa = pa_csv = None
+
+# Use pyarrow's CSV reader when it is installed; set to False to force the pandas parser
+USE_ARROW_CSV = True
+
+# Sum the hourly bins with a compiled numba kernel for large inputs when numba is installed; set to False to disable
+USE_NUMBA = True
+# Below this many rows the JIT dispatch overhead outweighs the faster kernel
+_NUMBA_MIN_ROWS = 50_000
+# numba is imported and the kernel compiled on the first large input (False: numba is not installed)
+_NUMBA_KERNEL = None
+
+# Standard names for the Date, interval start time and consumption columns of the export
+RAW_COLUMNS = ['Date', 'Hour', 'KWH']
+
+# CSVs larger than this are loaded and cleaned in chunks of _CSV_CHUNKSIZE rows to bound peak memory
+_CHUNKED_LOAD_BYTES = 64 * 1024 * 1024
+_CSV_CHUNKSIZE = 200_000
+
+# The schema is fixed: read the three columns as text, cleaning coerces the types
+_PANDAS_CSV_OPTIONS = dict(
+    skiprows=12,
+    header=0,
+    usecols=[0, 1, 2],
+    names=RAW_COLUMNS,
+    dtype={column: str for column in RAW_COLUMNS},
+    engine='c',
+    encoding='utf-8',
+    memory_map=True
+)
+
+# Bump whenever the cleaned/aggregated layout changes so stale cache files are not reused
+_CACHE_VERSION = 3
+# Bound on each pipeline's in-process memo of results
+_MAX_CACHE_ENTRIES = 64
+
+# Weeks are numbered from this Monday so that a week ordinal is a single integer division
+_WEEK_EPOCH = np.datetime64('1970-01-05', 'D')
+
+_SEASONS = ['Winter', 'Spring', 'Summer', 'Autumn']
+
+# Day name per day-of-week number (0 = Monday)
+_DAY_NAMES = np.array(['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday'])
+
+# Israeli coastal climate season per calendar month, indexed 1-12 (index 0 unused)
+_SEASON_LUT = np.array([
+    '', 'Winter', 'Winter', 'Spring', 'Spring', 'Spring',
+    'Summer', 'Summer', 'Summer', 'Summer', 'Autumn', 'Autumn', 'Winter'
+])
+
+
+def _load_raw_data(file_path: str) -> pd.DataFrame:
+    """Load raw CSV data while skipping metadata rows."""
+    try:
+        if USE_ARROW_CSV and pa_csv is not None:
+            return _load_raw_data_arrow(file_path)
+        
+        return pd.read_csv(file_path, **_PANDAS_CSV_OPTIONS)
+    except FileNotFoundError:
+        raise FileNotFoundError(f"Could not find the file: {file_path}")
+    except Exception as e:
+        raise Exception(f"Error loading data from {file_path}: {str(e)}")
+
+
+def _load_raw_data_arrow(file_path: str) -> pd.DataFrame:
+    """Load raw CSV data with pyarrow's multithreaded parser (same layout as the pandas path)."""
+    # Row 13 is consumed as the header row, exactly as pandas does after skiprows=12
+    with open(file_path, encoding='utf-8') as f:
+        header = next(csv.reader(islice(f, 12, 13)), None)
+    if not header:
+        raise pd.errors.EmptyDataError("No columns to parse from file")
+    if len(header) < 3:
+        raise ValueError(f"Expected at least 3 columns, but found {len(header)}")
+    
+    # Text columns keep pyarrow from inferring "HH:MM" as time32; cleaning coerces the types
+    column_names = RAW_COLUMNS + [f"extra_{i}" for i in range(len(header) - 3)]
+    table = pa_csv.read_csv(
+        file_path,
+        read_options=pa_csv.ReadOptions(skip_rows=13, column_names=column_names, use_threads=True),
+        # Rows with too few fields (e.g. trailing metadata) are dropped, as pandas' NaN-filled rows are by cleaning
+        parse_options=pa_csv.ParseOptions(delimiter=',', invalid_row_handler=lambda row: 'skip'),
+        convert_options=pa_csv.ConvertOptions(
+            include_columns=RAW_COLUMNS,
+            column_types={column: pa.string() for column in RAW_COLUMNS},
+            strings_can_be_null=True
+        )
+    )
+    return table.to_pandas()
+
+
+def _clean_raw_data(df: pd.DataFrame, allow_empty: bool = False) -> pd.DataFrame:
+    """Clean and standardize the raw dataset (allow_empty permits chunks with no valid rows)."""
+    try:
+        if len(df.columns) < 3:
+            raise ValueError(f"Expected at least 3 columns, but found {len(df.columns)}")
+        
+        # Loaders already name the columns; positional naming also accepts raw headers.
+        # set_axis/dropna return new frames, so the caller's data is never modified
+        df_clean = df.iloc[:, :3].set_axis(RAW_COLUMNS, axis=1)
+        df_clean = df_clean.dropna(subset=RAW_COLUMNS)
+        
+        # Convert data types
+        # ~96 readings share each date string; cache=True parses each distinct date once
+        df_clean['Date'] = pd.to_datetime(df_clean['Date'], format='%d/%m/%Y', errors='coerce', cache=True)
+        df_clean['KWH'] = pd.to_numeric(df_clean['KWH'], errors='coerce').astype(np.float32)
+        
+        # Parse "HH:MM" with an explicit format instead of building datetime.time objects;
+        # Hour temporarily holds the minute of day (NaN for invalid times)
+        times = pd.to_datetime(df_clean['Hour'], format='%H:%M', errors='coerce')
+        df_clean['Hour'] = times.dt.hour * 60 + times.dt.minute
+        
+        df_clean = df_clean.dropna()
+        
+        # DateTime = Date + interval start offset, in plain datetime64 arithmetic
+        minute_of_day = df_clean['Hour'].to_numpy(dtype=np.int64)
+        df_clean['Hour'] = (minute_of_day // 60).astype(np.uint8)
+        df_clean['DateTime'] = df_clean['Date'].to_numpy() + minute_of_day.astype('timedelta64[m]')
+        
+        # Downstream code relies on Date order (e.g. the date span is read off the endpoints);
+        # exports are normally chronological already, so the stable sort rarely runs
+        if not df_clean['Date'].is_monotonic_increasing:
+            df_clean = df_clean.sort_values('Date', kind='mergesort')
+        
+        if len(df_clean) == 0 and not allow_empty:
+            raise ValueError("No valid data remaining after cleaning process")
+        
+        return df_clean
+        
+    except Exception as e:
+        raise Exception(f"Error cleaning data: {str(e)}")
+
+
+def _validate_cleaned_data(df: pd.DataFrame) -> bool:
+    """Validate that the cleaned DataFrame has the expected structure."""
+    expected_columns = ['Date', 'Hour', 'KWH', 'DateTime']
+    
+    if list(df.columns) != expected_columns:
+        raise ValueError(f"Expected columns {expected_columns}, but found {list(df.columns)}")
+    
+    if not pd.api.types.is_datetime64_any_dtype(df['Date']):
+        raise ValueError("Date column should be datetime type")
+    
+    if not pd.api.types.is_numeric_dtype(df['KWH']):
+        raise ValueError("KWH column should be numeric type")
+    
+    if len(df) == 0:
+        raise ValueError("DataFrame is empty")
+    
+    return True
+
+
+def _iter_clean_chunks(file_path: str, chunksize: int) -> Iterator[pd.DataFrame]:
+    """Yield the cleaned readings of a CSV in pieces of at most chunksize raw rows."""
+    try:
+        reader = pd.read_csv(file_path, chunksize=chunksize, **_PANDAS_CSV_OPTIONS)
+    except FileNotFoundError:
+        raise FileNotFoundError(f"Could not find the file: {file_path}")
+    
+    with reader:
+        for df_raw in reader:
+            df_clean = _clean_raw_data(df_raw, allow_empty=True)
+            if len(df_clean) > 0:
+                yield df_clean
+
+
+def _load_clean_data(file_path: str) -> pd.DataFrame:
+    """
+    Load and clean the CSV.
+    
+    Files above _CHUNKED_LOAD_BYTES are cleaned _CSV_CHUNKSIZE rows at a time and only
+    the typed, cleaned chunks are concatenated, so the raw text frame is never held whole.
+    """
+    try:
+        file_size = os.path.getsize(file_path)
+    except OSError:
+        file_size = 0  # Let the regular loader report the problem
+    
+    if file_size <= _CHUNKED_LOAD_BYTES:
+        return _clean_raw_data(_load_raw_data(file_path))
+    
+    chunks = list(_iter_clean_chunks(file_path, _CSV_CHUNKSIZE))
+    if not chunks:
+        raise ValueError("No valid data remaining after cleaning process")
+    
+    df_clean = pd.concat(chunks, ignore_index=True)
+    if not df_clean['Date'].is_monotonic_increasing:
+        df_clean = df_clean.sort_values('Date', kind='mergesort')
+    return df_clean
+
+
+def _hourly_partials(df_clean: pd.DataFrame) -> pd.DataFrame:
+    """Collapse cleaned readings to KWH sums (float64) and reading counts per (Date, Hour)."""
+    return df_clean.assign(KWH=df_clean['KWH'].astype(np.float64)).groupby(
+        ['Date', 'Hour'], sort=False, observed=True, as_index=False
+    ).agg(KWH=('KWH', 'sum'), Count=('KWH', 'size'))
+
+
+def _load_hourly_partials(file_path: str, chunksize: int) -> pd.DataFrame:
+    """
+    Read and clean a CSV chunksize rows at a time, keeping only per-(Date, Hour) sums.
+    
+    Peak memory is bounded by the chunk size plus the hourly output; the result
+    carries a Count column of readings per hour and is in Date order.
+    """
+    partials = [_hourly_partials(df_chunk) for df_chunk in _iter_clean_chunks(file_path, chunksize)]
+    if not partials:
+        raise ValueError("No valid data remaining after cleaning process")
+    
+    # Readings of one hour can straddle a chunk boundary, so partials are combined once more.
+    # This is the one sorted groupby: validation expects its input in Date order
+    return pd.concat(partials, ignore_index=True).groupby(
+        ['Date', 'Hour'], observed=True, as_index=False
+    )[['KWH', 'Count']].sum()
+
+
+def _hourly_sums_loop(day_idx, hours, kwh, reading_counts, n_bins):
+    """Single fused pass over the readings: (date, hour) key, KWH sum and reading count."""
+    sums = np.zeros(n_bins)
+    counts = np.zeros(n_bins)
+    for i in range(kwh.shape[0]):
+        key = day_idx[i] * 24 + hours[i]
+        sums[key] += kwh[i]
+        if reading_counts is None:
+            counts[key] += 1.0
+        else:
+            counts[key] += reading_counts[i]
+    return sums, counts
+
+
+def _hourly_sums_numba():
+    """Return the numba-compiled _hourly_sums_loop, or None if numba is not installed."""
+    global _NUMBA_KERNEL
+    if _NUMBA_KERNEL is None:
+        # Imported here rather than at module load: numba adds ~100 ms to every import
+        try:
+            import numba
+        except ImportError:
+            _NUMBA_KERNEL = False
+        else:
+            _NUMBA_KERNEL = numba.njit(cache=True, nogil=True, boundscheck=False)(_hourly_sums_loop)
+    return _NUMBA_KERNEL or None
+
+
+def _bincount_hourly(df: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Sum KWH per (date, hour) by packing both into one integer key.
+    
+    Returns the dates, hours, sums and reading counts of the hours present, in time order.
+    """
+    dates = df['Date'].to_numpy().astype('datetime64[D]')
+    first_day = dates.min()
+    day_idx = (dates - first_day).astype(np.int64)
+    n_bins = (int(day_idx.max()) + 1) * 24
+    
+    # Pre-summed frames (see process_electricity_data_chunked) carry per-row reading counts
+    reading_counts = df['Count'].to_numpy() if 'Count' in df.columns else None
+    kernel = _hourly_sums_numba() if USE_NUMBA and len(df) > _NUMBA_MIN_ROWS else None
+    if kernel is not None:
+        sums, counts = kernel(
+            day_idx, df['Hour'].to_numpy(), df['KWH'].to_numpy(), reading_counts, n_bins
+        )
+    else:
+        keys = day_idx * 24 + df['Hour'].to_numpy()
+        sums = np.bincount(keys, weights=df['KWH'].to_numpy(), minlength=n_bins)
+        counts = np.bincount(keys, weights=reading_counts, minlength=n_bins)
+    present = np.flatnonzero(counts)
+    
+    hour_dates = (first_day + present // 24).astype(df['Date'].dtype)
+    # Output keys use a regular integer type so arithmetic on them cannot wrap
+    return hour_dates, (present % 24).astype(np.int32), sums[present], counts[present]
+
+
+def _reduce_runs(values: np.ndarray, *keys: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Sum values over runs of equal consecutive keys; returns each run's first index and its sum."""
+    run_start = np.zeros(len(values), dtype=bool)
+    run_start[0] = True
+    for key in keys:
+        run_start[1:] |= key[1:] != key[:-1]
+    starts = np.flatnonzero(run_start)
+    return starts, np.add.reduceat(values, starts)
+
+
+def _iso_week_labels(week_ids: np.ndarray) -> pd.api.extensions.ExtensionArray:
+    """ISO week numbers of week ordinals, computed from each week's Monday."""
+    week_starts = _WEEK_EPOCH + (week_ids * 7).astype('timedelta64[D]')
+    return pd.DatetimeIndex(week_starts).isocalendar()['week'].array
+
+
+def _round_consumption(df_agg: pd.DataFrame, column: str) -> None:
+    """Round a consumption column to 3 decimals as float64, reusing a single buffer."""
+    values = df_agg[column].to_numpy(dtype=np.float64, copy=True)
+    np.round(values, 3, out=values)
+    df_agg[column] = values
+
+
+def _cache_paths(file_path: str, cache_tag: str, levels: list) -> Tuple[str, Dict[str, str]]:
+    """Parquet cache locations for the cleaned data and each aggregation level of one pipeline."""
+    prefix = f"{file_path}.{cache_tag}.v{_CACHE_VERSION}"
+    clean_path = f"{prefix}.clean.parquet"
+    agg_paths = {level: f"{prefix}.agg.{level}.parquet" for level in levels}
+    return clean_path, agg_paths
+
+
+def _user_cache_dir(create: bool = False) -> Optional[str]:
+    """
+    Private per-user directory for the fallback aggregation cache (created with mode 0700 if create).
+    
+    The shared temp directory is writable by everyone, so a directory that is not ours,
+    is a symlink or is open to other users is refused (None) rather than trusted.
+    """
+    uid = os.getuid() if hasattr(os, 'getuid') else None
+    path = os.path.join(tempfile.gettempdir(), f"powerlytics-{uid if uid is not None else 'cache'}")
+    try:
+        if create:
+            os.makedirs(path, mode=0o700, exist_ok=True)
+        info = os.lstat(path)
+    except OSError:
+        return None
+    if not stat.S_ISDIR(info.st_mode):
+        return None
+    if uid is not None and (info.st_uid != uid or info.st_mode & 0o077):
+        return None
+    return path
+
+
+def _aggregation_cache_paths(
+    fingerprint: str,
+    cache_tag: str,
+    levels: list,
+    create: bool = False
+) -> Optional[Dict[str, str]]:
+    """Fallback cache locations for aggregations of a cleaned dataset; None without a safe directory."""
+    cache_dir = _user_cache_dir(create)
+    if cache_dir is None:
+        return None
+    prefix = os.path.join(cache_dir, f"{cache_tag}_v{_CACHE_VERSION}_agg_{fingerprint}")
+    return {level: f"{prefix}.{level}.parquet" for level in levels}
+
+
+def _read_fallback_aggregations(fingerprint: str, cache_tag: str, levels: list) -> Optional[Dict[str, pd.DataFrame]]:
+    """Read aggregations from the per-user fallback cache; None if they are not cached."""
+    paths = _aggregation_cache_paths(fingerprint, cache_tag, levels)
+    return None if paths is None else _read_parquet_frames(paths)
+
+
+def _write_fallback_aggregations(aggregations: Dict[str, pd.DataFrame], fingerprint: str, cache_tag: str) -> bool:
+    """Write aggregations to the per-user fallback cache; returns whether every file was written."""
+    paths = _aggregation_cache_paths(fingerprint, cache_tag, list(aggregations), create=True)
+    return paths is not None and _write_parquet_frames(aggregations, paths)
+
+
+def _data_fingerprint(df: pd.DataFrame) -> str:
+    """Content hash of the cleaned readings; equal fingerprints give equal aggregations."""
+    digest = hashlib.blake2b(str(len(df)).encode(), digest_size=16)
+    for column in RAW_COLUMNS:
+        digest.update(np.ascontiguousarray(df[column].to_numpy()).view(np.uint8))
+    return digest.hexdigest()
+
+
+def _read_parquet_frames(paths: Dict[str, str]) -> Optional[Dict[str, pd.DataFrame]]:
+    """Read a set of cached frames; returns None unless every file is present and readable."""
+    if pa is None:
+        return None
+    try:
+        return {key: pd.read_parquet(path, engine='pyarrow') for key, path in paths.items()}
+    except (OSError, ValueError):
+        return None
+
+
+def _write_parquet_frames(frames: Dict[str, pd.DataFrame], paths: Dict[str, str]) -> bool:
+    """Write a set of frames as Parquet; returns False if pyarrow is missing or the location is not writable."""
+    if pa is None:
+        return False
+    try:
+        for key, path in paths.items():
+            frames[key].to_parquet(path, engine='pyarrow', compression='snappy')
+    except OSError:
+        return False
+    return True
+
+
+def _copy_frames(frames: Dict[str, pd.DataFrame]) -> Dict[str, pd.DataFrame]:
+    """Copy cached frames so that callers modifying their results cannot corrupt the cache."""
+    return {key: df.copy() for key, df in frames.items()}
+
+
+def _remember(cache: dict, key, value) -> None:
+    """Store a value in an in-process cache, evicting the oldest entry once it is full."""
+    if len(cache) >= _MAX_CACHE_ENTRIES:
+        cache.pop(next(iter(cache)))
+    cache[key] = value
+
+
+def _load_cached_results(
+    file_path: str,
+    cache_tag: str,
+    levels: list
+) -> Optional[Tuple[pd.DataFrame, Dict[str, pd.DataFrame]]]:
+    """Return cached pipeline results if every cache file is newer than the source CSV."""
+    clean_path, agg_paths = _cache_paths(file_path, cache_tag, levels)
+    try:
+        source_mtime = os.path.getmtime(file_path)
+        if any(os.path.getmtime(path) <= source_mtime for path in [clean_path, *agg_paths.values()]):
+            return None
+    except OSError:
+        return None
+    
+    frames = _read_parquet_frames({'clean': clean_path, **{f'agg.{level}': path for level, path in agg_paths.items()}})
+    if frames is None:
+        return None
+    return frames['clean'], {level: frames[f'agg.{level}'] for level in agg_paths}
+
+
+def _save_cached_results(
+    file_path: str,
+    cache_tag: str,
+    df_clean: pd.DataFrame,
+    aggregations: Dict[str, pd.DataFrame]
+) -> bool:
+    """Write pipeline results next to the source CSV; returns whether every file was written."""
+    clean_path, agg_paths = _cache_paths(file_path, cache_tag, list(aggregations))
+    return (
+        _write_parquet_frames({'clean': df_clean}, {'clean': clean_path})
+        and _write_parquet_frames(aggregations, agg_paths)
+    )
@@ -8,173 +8,216 @@ Core functionality for processing electricity consumption data:
 """
 
 import pandas as pd
-from typing import Dict
+from typing import Dict, Optional
 import numpy as np
 
+from ._common import (
+    RAW_COLUMNS,
+    _DAY_NAMES,
+    _SEASONS,
+    _SEASON_LUT,
+    _WEEK_EPOCH,
+    _bincount_hourly,
+    _clean_raw_data,
+    _copy_frames,
+    _data_fingerprint,
+    _iso_week_labels,
+    _load_cached_results,
+    _load_clean_data,
+    _load_hourly_partials,
+    _load_raw_data,
+    _read_fallback_aggregations,
+    _reduce_runs,
+    _remember,
+    _round_consumption,
+    _save_cached_results,
+    _validate_cleaned_data,
+    _write_fallback_aggregations,
+)
 
-def _load_raw_data(file_path: str) -> pd.DataFrame:
-    """Load raw CSV data while skipping metadata rows."""
-    try:
-        df_raw = pd.read_csv(file_path, skiprows=12, encoding='utf-8')
-        df_raw = df_raw.dropna(how='all')
-        return df_raw
-    except FileNotFoundError:
-        raise FileNotFoundError(f"Could not find the file: {file_path}")
-    except Exception as e:
-        raise Exception(f"Error loading data from {file_path}: {str(e)}")
+# Distinguishes this module's Parquet cache files from other pipelines reading the same CSV
+_CACHE_TAG = "powerlytics"
+# In-process memo of results, keyed by data fingerprint; bounded, emptied by clear_cache()
+_AGG_CACHE: Dict[str, Dict[str, pd.DataFrame]] = {}
 
-
-def _clean_raw_data(df: pd.DataFrame) -> pd.DataFrame:
-    """Clean and standardize the raw dataset."""
-    try:
-        df_clean = df.copy()
-        original_columns = df_clean.columns.tolist()
-        
-        if len(original_columns) < 3:
-            raise ValueError(f"Expected at least 3 columns, but found {len(original_columns)}")
-        
-        # Rename columns to standard English names
-        column_mapping = {
-            original_columns[0]: 'Date',
-            original_columns[1]: 'Hour', 
-            original_columns[2]: 'KWH'
-        }
-        df_clean = df_clean.rename(columns=column_mapping)
-        df_clean = df_clean[['Date', 'Hour', 'KWH']]
-        df_clean = df_clean.dropna(subset=['Date', 'Hour', 'KWH'])
-        
-        # Convert data types
-        df_clean['Date'] = pd.to_datetime(df_clean['Date'], format='%d/%m/%Y', errors='coerce')
-        df_clean['Hour'] = pd.to_datetime(df_clean['Hour'], format='%H:%M', errors='coerce').dt.time
-        df_clean['KWH'] = pd.to_numeric(df_clean['KWH'], errors='coerce')
-        
-        df_clean = df_clean.dropna()
-        
-        if len(df_clean) == 0:
-            raise ValueError("No valid data remaining after cleaning process")
-        
-        return df_clean
-        
-    except Exception as e:
-        raise Exception(f"Error cleaning data: {str(e)}")
+LEVELS = [
+    "hourly", "daily", "weekly", "monthly", 
+    "seasonal", "yearly", "hour_of_day", "day_of_week"
+]
 
 
-def _validate_cleaned_data(df: pd.DataFrame) -> bool:
-    """Validate that the cleaned DataFrame has the expected structure."""
-    expected_columns = ['Date', 'Hour', 'KWH']
+def process_electricity_data(
+    file_path: str,
+    use_cache: bool = True,
+    validate: bool = True
+) -> tuple[pd.DataFrame, Dict[str, pd.DataFrame]]:
+    """Complete data processing pipeline with aggregation (Parquet-cached next to the CSV)."""
+    if use_cache:
+        cached = _load_cached_results(file_path, _CACHE_TAG, LEVELS)
+        if cached is not None:
+            return cached
     
-    if list(df.columns) != expected_columns:
-        raise ValueError(f"Expected columns {expected_columns}, but found {list(df.columns)}")
-    
-    if not pd.api.types.is_datetime64_any_dtype(df['Date']):
-        raise ValueError("Date column should be datetime type")
-    
-    if not pd.api.types.is_numeric_dtype(df['KWH']):
-        raise ValueError("KWH column should be numeric type")
-    
-    if len(df) == 0:
-        raise ValueError("DataFrame is empty")
+    df_clean = _load_clean_data(file_path)
+    _validate_cleaned_data(df_clean)
+    aggregations = _aggregate_all_levels(df_clean, validate=validate, use_cache=use_cache)
     
-    return True
+    # Results are cached next to the CSV; the temp-directory cache is only written as a
+    # fallback when that location is not writable, so the frames are never stored twice
+    if use_cache and not _save_cached_results(file_path, _CACHE_TAG, df_clean, aggregations):
+        _write_fallback_aggregations(aggregations, _data_fingerprint(df_clean), _CACHE_TAG)
+    return df_clean, aggregations
 
 
-def process_electricity_data(file_path: str) -> tuple[pd.DataFrame, Dict[str, pd.DataFrame]]:
-    """Complete data processing pipeline with aggregation."""
-    df_raw = _load_raw_data(file_path)
-    df_clean = _clean_raw_data(df_raw)
-    _validate_cleaned_data(df_clean)
-    aggregations = _aggregate_all_levels(df_clean)
-    return df_clean, aggregations
+def process_electricity_data_chunked(
+    file_path: str,
+    chunksize: int = 100_000,
+    validate: bool = True
+) -> Dict[str, pd.DataFrame]:
+    """Aggregation pipeline for CSVs too large to load at once; only the aggregations are returned."""
+    df_hourly = _load_hourly_partials(file_path, chunksize)
+    return _aggregate_all_levels(df_hourly, validate=validate, use_cache=False)
+
+
+def clear_cache() -> None:
+    """Drop the in-process results; the Parquet caches are bypassed with use_cache=False instead."""
+    _AGG_CACHE.clear()
+
+
+def _add_calendar_columns(df: pd.DataFrame) -> pd.DataFrame:
+    """Derive the calendar grouping keys used by the aggregation levels."""
+    # One datetime64 decomposition: day and month ordinals since 1970 give every key arithmetically
+    days = df['Date'].to_numpy().astype('datetime64[D]')
+    day_ords = days.astype(np.int64)
+    month_ords = days.astype('datetime64[M]').astype(np.int32)
+    months = month_ords % 12 + 1
+    return df.assign(
+        Year=month_ords // 12 + 1970,
+        Month=months,
+        WeekId=((days - _WEEK_EPOCH).astype(np.int32) // 7),
+        Season=pd.Categorical(_SEASON_LUT[months], categories=_SEASONS),
+        # 1970-01-01 was a Thursday (weekday 3 with Monday = 0)
+        DayOfWeek=pd.Categorical.from_codes((day_ords + 3) % 7, categories=_DAY_NAMES)
+    )
+
+
+def _bincount_mean(
+    keys: np.ndarray,
+    values: np.ndarray,
+    n_bins: int,
+    counts: Optional[np.ndarray] = None
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Average values per small non-negative integer key; returns the keys present and their means.
+    
+    counts gives the number of readings behind each value when the values are pre-summed.
+    """
+    sums = np.bincount(keys, weights=values, minlength=n_bins)
+    counts = np.bincount(keys, weights=counts, minlength=n_bins)
+    present = np.flatnonzero(counts)
+    return present, sums[present] / counts[present]
 
 
 def _aggregate_data(df: pd.DataFrame, level: str = "daily") -> pd.DataFrame:
     """Perform aggregation of the cleaned dataset for a specific time level."""
-    if level not in ["hourly", "daily", "weekly", "monthly", "seasonal", "yearly", 
-                     "hour_of_day", "day_of_week"]:
+    if level not in LEVELS:
         raise ValueError(f"Unsupported aggregation level: {level}")
     
-    df_work = df.copy()
-    df_work['DateTime'] = pd.to_datetime(
-        df_work['Date'].astype(str) + ' ' + df_work['Hour'].astype(str)
+    return _aggregate_levels_hierarchically(df)[level]
+
+
+def _aggregate_levels_hierarchically(df: pd.DataFrame) -> Dict[str, pd.DataFrame]:
+    """
+    Compute all levels with a single pass over the readings.
+    
+    Only the hourly sums read the raw data; every coarser level re-reduces the
+    previous, much smaller, time-ordered table, so contiguous periods are summed
+    with np.add.reduceat. Sums are kept unrounded until all levels are built.
+    """
+    hour_dates, hours, hour_kwh, hour_counts = _bincount_hourly(df)
+    
+    day_starts, day_kwh = _reduce_runs(hour_kwh, hour_dates)
+    days = hour_dates[day_starts]
+    df_days = _add_calendar_columns(pd.DataFrame({'Date': days}))
+    years = df_days['Year'].to_numpy()
+    
+    week_starts, week_kwh = _reduce_runs(day_kwh, years, df_days['WeekId'].to_numpy())
+    month_starts, month_kwh = _reduce_runs(day_kwh, years, df_days['Month'].to_numpy())
+    month_years = years[month_starts]
+    year_starts, year_kwh = _reduce_runs(month_kwh, month_years)
+    
+    # Winter spans the year boundary, so (Year, Season) runs are not contiguous; group the few months
+    df_seasonal = pd.DataFrame({
+        'Year': month_years,
+        'Season': df_days['Season'].iloc[month_starts].array,
+        'KWH': month_kwh
+    }).groupby(['Year', 'Season'], sort=False, observed=True, as_index=False)['KWH'].sum()
+    
+    hours_present, hour_avg = _bincount_mean(hours, hour_kwh, 24, hour_counts)
+    day_codes, day_avg = _bincount_mean(
+        df_days['DayOfWeek'].cat.codes.to_numpy(), day_kwh, 7, np.add.reduceat(hour_counts, day_starts)
     )
-    df_work['KWH'] = df_work['KWH'].round(3)
-    
-    if level == "hourly":
-        df_agg = df_work.groupby([
-            df_work['Date'],
-            df_work['DateTime'].dt.hour
-        ])['KWH'].sum().reset_index()
-        df_agg.columns = ['Date', 'Hour', 'KWH']
-        df_agg['KWH'] = df_agg['KWH'].round(3)
-        
-    elif level == "daily":
-        df_agg = df_work.groupby('Date')['KWH'].sum().reset_index()
-        df_agg['KWH'] = df_agg['KWH'].round(3)
-        
-    elif level == "weekly":
-        df_work['Week'] = df_work['Date'].dt.isocalendar().week
-        df_work['Year'] = df_work['Date'].dt.year
-        df_agg = df_work.groupby(['Year', 'Week'])['KWH'].sum().reset_index()
-        df_agg['KWH'] = df_agg['KWH'].round(3)
-        
-    elif level == "monthly":
-        df_work['Month'] = df_work['Date'].dt.month
-        df_work['Year'] = df_work['Date'].dt.year
-        df_agg = df_work.groupby(['Year', 'Month'])['KWH'].sum().reset_index()
-        df_agg['KWH'] = df_agg['KWH'].round(3)
-        
-    elif level == "seasonal":
-        def get_season(month):
-            if month in [12, 1, 2]:
-                return 'Winter'
-            elif month in [3, 4, 5]:
-                return 'Spring'
-            elif month in [6, 7, 8, 9]:
-                return 'Summer'
-            else:
-                return 'Autumn'
-        
-        df_work['Season'] = df_work['Date'].dt.month.apply(get_season)
-        df_work['Year'] = df_work['Date'].dt.year
-        df_agg = df_work.groupby(['Year', 'Season'])['KWH'].sum().reset_index()
-        df_agg['KWH'] = df_agg['KWH'].round(3)
-        
-    elif level == "yearly":
-        df_work['Year'] = df_work['Date'].dt.year
-        df_agg = df_work.groupby('Year')['KWH'].sum().reset_index()
-        df_agg['KWH'] = df_agg['KWH'].round(3)
-        
-    elif level == "hour_of_day":
-        df_work['HourOfDay'] = df_work['DateTime'].dt.hour
-        df_agg = df_work.groupby('HourOfDay')['KWH'].mean().reset_index()
-        df_agg.columns = ['Hour', 'Avg_KWH']
-        df_agg['Avg_KWH'] = df_agg['Avg_KWH'].round(3)
-        
-    elif level == "day_of_week":
-        df_work['DayOfWeek'] = df_work['Date'].dt.dayofweek
-        day_names = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
-        df_agg = df_work.groupby('DayOfWeek')['KWH'].mean().reset_index()
-        df_agg['DayOfWeek'] = df_agg['DayOfWeek'].apply(lambda x: day_names[x])
-        df_agg.columns = ['DayOfWeek', 'Avg_KWH']
-        df_agg['Avg_KWH'] = df_agg['Avg_KWH'].round(3)
     
-    return df_agg
+    aggregations = {
+        "hourly": pd.DataFrame({'Date': hour_dates, 'Hour': hours, 'KWH': hour_kwh}),
+        "daily": pd.DataFrame({'Date': days, 'KWH': day_kwh}),
+        "weekly": pd.DataFrame({
+            'Year': years[week_starts],
+            'Week': _iso_week_labels(df_days['WeekId'].to_numpy()[week_starts]),
+            # Weeks crossing New Year are split per calendar year, so the ISO number alone can repeat
+            'WeekStart': days[week_starts],
+            'KWH': week_kwh
+        }),
+        "monthly": pd.DataFrame({
+            'Year': month_years,
+            'Month': df_days['Month'].to_numpy()[month_starts],
+            'KWH': month_kwh
+        }),
+        "seasonal": df_seasonal,
+        "yearly": pd.DataFrame({'Year': month_years[year_starts], 'KWH': year_kwh}),
+        "hour_of_day": pd.DataFrame({'Hour': hours_present.astype(np.int32), 'Avg_KWH': hour_avg}),
+        "day_of_week": pd.DataFrame({
+            'DayOfWeek': pd.Categorical.from_codes(day_codes, categories=_DAY_NAMES),
+            'Avg_KWH': day_avg
+        }),
+    }
+    
+    # Sums run over float32 input; report the results in float64, rounded once
+    for df_agg in aggregations.values():
+        _round_consumption(df_agg, df_agg.columns[-1])
+    
+    return aggregations
 
 
-def _aggregate_all_levels(df: pd.DataFrame) -> Dict[str, pd.DataFrame]:
+def _aggregate_all_levels(
+    df: pd.DataFrame,
+    validate: bool = True,
+    use_cache: bool = True
+) -> Dict[str, pd.DataFrame]:
     """Automatically compute all aggregation levels."""
-    aggregation_levels = [
-        "hourly", "daily", "weekly", "monthly", 
-        "seasonal", "yearly", "hour_of_day", "day_of_week"
-    ]
-    
-    aggregations = {}
-    
     try:
-        for level in aggregation_levels:
-            aggregations[level] = _aggregate_data(df, level)
+        # Aggregations are deterministic, so identical data reuses the results of an earlier run
+        if use_cache:
+            fingerprint = _data_fingerprint(df)
+            if fingerprint in _AGG_CACHE:
+                return _copy_frames(_AGG_CACHE[fingerprint])
+            
+            cached = _read_fallback_aggregations(fingerprint, _CACHE_TAG, LEVELS)
+            if cached is not None and validate:
+                # Files on disk are not trusted blindly: inconsistent ones are recomputed instead
+                try:
+                    _validate_aggregations(df, cached)
+                except Exception:
+                    cached = None
+            if cached is not None:
+                _remember(_AGG_CACHE, fingerprint, _copy_frames(cached))
+                return cached
+        
+        aggregations = _aggregate_levels_hierarchically(df)
         
-        _validate_aggregations(df, aggregations)
+        if validate:
+            _validate_aggregations(df, aggregations)
+        if use_cache:
+            _remember(_AGG_CACHE, fingerprint, _copy_frames(aggregations))
         return aggregations
         
     except Exception as e:
@@ -183,19 +226,23 @@ def _aggregate_all_levels(df: pd.DataFrame) -> Dict[str, pd.DataFrame]:
 
 def _validate_aggregations(df_original: pd.DataFrame, aggregations: Dict[str, pd.DataFrame]) -> bool:
     """Internal validation function to ensure aggregation consistency."""
-    original_total = df_original['KWH'].sum()
+    # The only pass over the raw readings: float32 values summed in a float64 accumulator (no copy)
+    original_total = df_original['KWH'].to_numpy().sum(dtype=np.float64)
     tolerance = 0.001
     
+    # Yearly totals are checked against the (small) daily frame rather than the raw data again
     daily_total = aggregations['daily']['KWH'].sum()
     yearly_total = aggregations['yearly']['KWH'].sum()
     
     if abs(original_total - daily_total) > tolerance:
         raise ValueError(f"Daily aggregation total ({daily_total:.3f}) doesn't match original ({original_total:.3f})")
     
-    if abs(original_total - yearly_total) > tolerance:
-        raise ValueError(f"Yearly aggregation total ({yearly_total:.3f}) doesn't match original ({original_total:.3f})")
+    if abs(daily_total - yearly_total) > tolerance:
+        raise ValueError(f"Yearly aggregation total ({yearly_total:.3f}) doesn't match daily total ({daily_total:.3f})")
     
-    days_in_data = (df_original['Date'].max() - df_original['Date'].min()).days + 1
+    # df_original is sorted by Date, so the span comes from the first and last rows
+    dates = df_original['Date']
+    days_in_data = (dates.iloc[-1] - dates.iloc[0]).days + 1
     daily_records = len(aggregations['daily'])
     
     if daily_records > days_in_data:
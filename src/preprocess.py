@@ -18,76 +18,64 @@ Phase 2.2 Features:
 import pandas as pd
 from typing import Dict, Optional, Union, Tuple
 import numpy as np
-import matplotlib.pyplot as plt
-import matplotlib.dates as mdates
 from datetime import datetime, date
-import seaborn as sns
 
+from ._common import (
+    RAW_COLUMNS,
+    _DAY_NAMES,
+    _SEASONS,
+    _SEASON_LUT,
+    _WEEK_EPOCH,
+    _bincount_hourly,
+    _clean_raw_data,
+    _copy_frames,
+    _data_fingerprint,
+    _iso_week_labels,
+    _load_cached_results,
+    _load_clean_data,
+    _load_hourly_partials,
+    _load_raw_data,
+    _read_fallback_aggregations,
+    _reduce_runs,
+    _remember,
+    _round_consumption,
+    _save_cached_results,
+    _validate_cleaned_data,
+    _write_fallback_aggregations,
+)
 
-def _load_raw_data(file_path: str) -> pd.DataFrame:
-    """Load raw CSV data while skipping metadata rows."""
-    try:
-        df_raw = pd.read_csv(file_path, skiprows=12, encoding='utf-8')
-        df_raw = df_raw.dropna(how='all')
-        return df_raw
-    except FileNotFoundError:
-        raise FileNotFoundError(f"Could not find the file: {file_path}")
-    except Exception as e:
-        raise Exception(f"Error loading data from {file_path}: {str(e)}")
+# Distinguishes this module's Parquet cache files from other pipelines reading the same CSV
+_CACHE_TAG = "preprocess"
+# In-process memo of results, keyed by data fingerprint; bounded, emptied by clear_cache()
+_AGG_CACHE: Dict[str, Dict[str, pd.DataFrame]] = {}
 
-
-def _clean_raw_data(df: pd.DataFrame) -> pd.DataFrame:
-    """Clean and standardize the raw dataset."""
-    try:
-        df_clean = df.copy()
-        original_columns = df_clean.columns.tolist()
-        
-        if len(original_columns) < 3:
-            raise ValueError(f"Expected at least 3 columns, but found {len(original_columns)}")
-        
-        # Rename columns to standard English names
-        column_mapping = {
-            original_columns[0]: 'Date',
-            original_columns[1]: 'Hour', 
-            original_columns[2]: 'KWH'
-        }
-        df_clean = df_clean.rename(columns=column_mapping)
-        df_clean = df_clean[['Date', 'Hour', 'KWH']]
-        df_clean = df_clean.dropna(subset=['Date', 'Hour', 'KWH'])
-        
-        # Convert data types
-        df_clean['Date'] = pd.to_datetime(df_clean['Date'], format='%d/%m/%Y', errors='coerce')
-        df_clean['Hour'] = pd.to_datetime(df_clean['Hour'], format='%H:%M', errors='coerce').dt.time
-        df_clean['KWH'] = pd.to_numeric(df_clean['KWH'], errors='coerce')
-        
-        df_clean = df_clean.dropna()
-        
-        if len(df_clean) == 0:
-            raise ValueError("No valid data remaining after cleaning process")
-        
-        return df_clean
-        
-    except Exception as e:
-        raise Exception(f"Error cleaning data: {str(e)}")
+PRIMARY_LEVELS = ["hourly", "daily", "weekly", "monthly", "seasonal", "yearly"]
 
 
-def _validate_cleaned_data(df: pd.DataFrame) -> bool:
-    """Validate that the cleaned DataFrame has the expected structure."""
-    expected_columns = ['Date', 'Hour', 'KWH']
-    
-    if list(df.columns) != expected_columns:
-        raise ValueError(f"Expected columns {expected_columns}, but found {list(df.columns)}")
-    
-    if not pd.api.types.is_datetime64_any_dtype(df['Date']):
-        raise ValueError("Date column should be datetime type")
-    
-    if not pd.api.types.is_numeric_dtype(df['KWH']):
-        raise ValueError("KWH column should be numeric type")
-    
-    if len(df) == 0:
-        raise ValueError("DataFrame is empty")
+def _add_calendar_columns(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Derive the calendar grouping keys shared by all primary aggregation levels.
     
-    return True
+    Computed once per cleaned dataset so that each level only performs its groupby.
+    """
+    # One datetime64 decomposition: day and month ordinals since 1970 give every key arithmetically
+    days = df['Date'].to_numpy().astype('datetime64[D]')
+    month_ords = days.astype('datetime64[M]').astype(np.int32)
+    months = month_ords % 12 + 1
+    return df.assign(
+        Year=month_ords // 12 + 1970,
+        Month=months,
+        WeekId=((days - _WEEK_EPOCH).astype(np.int32) // 7),
+        Season=pd.Categorical(_SEASON_LUT[months], categories=_SEASONS)
+    )
+
+
+def _bincount_mean(keys: np.ndarray, values: np.ndarray, n_bins: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Average values per small non-negative integer key; returns the keys present and their means."""
+    sums = np.bincount(keys, weights=values, minlength=n_bins)
+    counts = np.bincount(keys, minlength=n_bins)
+    present = np.flatnonzero(counts)
+    return present, sums[present] / counts[present]
 
 
 def _aggregate_data(df: pd.DataFrame, level: str = "daily") -> pd.DataFrame:
@@ -104,64 +92,75 @@ def _aggregate_data(df: pd.DataFrame, level: str = "daily") -> pd.DataFrame:
     Returns:
         DataFrame with aggregated data including Year column for multi-year datasets
     """
-    if level not in ["hourly", "daily", "weekly", "monthly", "seasonal", "yearly"]:
+    if level not in PRIMARY_LEVELS:
         raise ValueError(f"Unsupported aggregation level: {level}")
     
-    df_work = df.copy()
-    df_work['DateTime'] = pd.to_datetime(
-        df_work['Date'].astype(str) + ' ' + df_work['Hour'].astype(str)
-    )
-    df_work['KWH'] = df_work['KWH'].round(3)
-    df_work['Year'] = df_work['Date'].dt.year
-    
-    if level == "hourly":
-        df_agg = df_work.groupby([
-            df_work['Year'],
-            df_work['Date'],
-            df_work['DateTime'].dt.hour
-        ])['KWH'].sum().reset_index()
-        df_agg.columns = ['Year', 'Date', 'Hour', 'KWH']
-        df_agg['KWH'] = df_agg['KWH'].round(3)
-        
-    elif level == "daily":
-        df_agg = df_work.groupby([df_work['Year'], df_work['Date']])['KWH'].sum().reset_index()
-        df_agg.columns = ['Year', 'Date', 'KWH']
-        df_agg['KWH'] = df_agg['KWH'].round(3)
-        
-    elif level == "weekly":
-        df_work['Week'] = df_work['Date'].dt.isocalendar().week
-        df_agg = df_work.groupby(['Year', 'Week'])['KWH'].sum().reset_index()
-        df_agg['KWH'] = df_agg['KWH'].round(3)
-        
-    elif level == "monthly":
-        df_work['Month'] = df_work['Date'].dt.month
-        df_agg = df_work.groupby(['Year', 'Month'])['KWH'].sum().reset_index()
-        df_agg['KWH'] = df_agg['KWH'].round(3)
-        
-    elif level == "seasonal":
-        def get_season_israeli(month):
-            """Israeli coastal climate seasonal definitions."""
-            if month in [12, 1, 2]:
-                return 'Winter'
-            elif month in [3, 4, 5]:
-                return 'Spring'
-            elif month in [6, 7, 8, 9]:
-                return 'Summer'
-            else:  # October, November
-                return 'Autumn'
-        
-        df_work['Season'] = df_work['Date'].dt.month.apply(get_season_israeli)
-        df_agg = df_work.groupby(['Year', 'Season'])['KWH'].sum().reset_index()
-        df_agg['KWH'] = df_agg['KWH'].round(3)
-        
-    elif level == "yearly":
-        df_agg = df_work.groupby('Year')['KWH'].sum().reset_index()
-        df_agg['KWH'] = df_agg['KWH'].round(3)
+    return _aggregate_levels_hierarchically(df)[level]
+
+
+def _aggregate_levels_hierarchically(df: pd.DataFrame) -> Dict[str, pd.DataFrame]:
+    """
+    Compute all levels with a single pass over the readings.
     
-    return df_agg
+    Only the hourly sums read the raw data; every coarser level re-reduces the
+    previous, much smaller, time-ordered table, so contiguous periods are summed
+    with np.add.reduceat. Sums are kept unrounded until all levels are built.
+    """
+    hour_dates, hours, hour_kwh, hour_counts = _bincount_hourly(df)
+    
+    day_starts, day_kwh = _reduce_runs(hour_kwh, hour_dates)
+    days = hour_dates[day_starts]
+    df_days = _add_calendar_columns(pd.DataFrame({'Date': days}))
+    years = df_days['Year'].to_numpy()
+    
+    week_starts, week_kwh = _reduce_runs(day_kwh, years, df_days['WeekId'].to_numpy())
+    month_starts, month_kwh = _reduce_runs(day_kwh, years, df_days['Month'].to_numpy())
+    month_years = years[month_starts]
+    year_starts, year_kwh = _reduce_runs(month_kwh, month_years)
+    
+    # Winter spans the year boundary, so (Year, Season) runs are not contiguous; group the few months
+    df_seasonal = pd.DataFrame({
+        'Year': month_years,
+        'Season': df_days['Season'].iloc[month_starts].array,
+        'KWH': month_kwh
+    }).groupby(['Year', 'Season'], sort=False, observed=True, as_index=False)['KWH'].sum()
+    
+    aggregations = {
+        "hourly": pd.DataFrame({
+            'Year': np.repeat(years, np.diff(day_starts, append=len(hour_dates))),
+            'Date': hour_dates,
+            'Hour': hours,
+            'KWH': hour_kwh
+        }),
+        "daily": pd.DataFrame({'Year': years, 'Date': days, 'KWH': day_kwh}),
+        "weekly": pd.DataFrame({
+            'Year': years[week_starts],
+            'Week': _iso_week_labels(df_days['WeekId'].to_numpy()[week_starts]),
+            # Weeks crossing New Year are split per calendar year, so the ISO number alone can repeat
+            'WeekStart': days[week_starts],
+            'KWH': week_kwh
+        }),
+        "monthly": pd.DataFrame({
+            'Year': month_years,
+            'Month': df_days['Month'].to_numpy()[month_starts],
+            'KWH': month_kwh
+        }),
+        "seasonal": df_seasonal,
+        "yearly": pd.DataFrame({'Year': month_years[year_starts], 'KWH': year_kwh}),
+    }
+    
+    # Sums run over float32 input; report the results in float64, rounded once
+    for df_agg in aggregations.values():
+        _round_consumption(df_agg, df_agg.columns[-1])
+    
+    return aggregations
 
 
-def _aggregate_all_levels(df: pd.DataFrame) -> Dict[str, pd.DataFrame]:
+def _aggregate_all_levels(
+    df: pd.DataFrame,
+    validate: bool = True,
+    use_cache: bool = True
+) -> Dict[str, pd.DataFrame]:
     """
     Automatically compute all primary aggregation levels with multi-year support.
     
@@ -177,17 +176,30 @@ def _aggregate_all_levels(df: pd.DataFrame) -> Dict[str, pd.DataFrame]:
         Dict containing all primary aggregation DataFrames.
         Secondary groupings are generated separately using dynamic functions.
     """
-    primary_aggregation_levels = [
-        "hourly", "daily", "weekly", "monthly", "seasonal", "yearly"
-    ]
-    
-    aggregations = {}
-    
     try:
-        for level in primary_aggregation_levels:
-            aggregations[level] = _aggregate_data(df, level)
+        # Aggregations are deterministic, so identical data reuses the results of an earlier run
+        if use_cache:
+            fingerprint = _data_fingerprint(df)
+            if fingerprint in _AGG_CACHE:
+                return _copy_frames(_AGG_CACHE[fingerprint])
+            
+            cached = _read_fallback_aggregations(fingerprint, _CACHE_TAG, PRIMARY_LEVELS)
+            if cached is not None and validate:
+                # Files on disk are not trusted blindly: inconsistent ones are recomputed instead
+                try:
+                    _validate_aggregations(df, cached)
+                except Exception:
+                    cached = None
+            if cached is not None:
+                _remember(_AGG_CACHE, fingerprint, _copy_frames(cached))
+                return cached
         
-        _validate_aggregations(df, aggregations)
+        aggregations = _aggregate_levels_hierarchically(df)
+        
+        if validate:
+            _validate_aggregations(df, aggregations)
+        if use_cache:
+            _remember(_AGG_CACHE, fingerprint, _copy_frames(aggregations))
         return aggregations
         
     except Exception as e:
@@ -203,31 +215,41 @@ def _validate_aggregations(df_original: pd.DataFrame, aggregations: Dict[str, pd
     - Year column presence in multi-year aggregations
     - Data integrity and no cross-year merging
     """
-    original_total = df_original['KWH'].sum()
+    # The only pass over the raw readings: float32 values summed in a float64 accumulator (no copy)
+    original_total = df_original['KWH'].to_numpy().sum(dtype=np.float64)
     tolerance = 0.001
     
+    # Yearly totals are checked against the (small) daily frame rather than the raw data again
     daily_total = aggregations['daily']['KWH'].sum()
     yearly_total = aggregations['yearly']['KWH'].sum()
     
     if abs(original_total - daily_total) > tolerance:
         raise ValueError(f"Daily aggregation total ({daily_total:.3f}) doesn't match original ({original_total:.3f})")
     
-    if abs(original_total - yearly_total) > tolerance:
-        raise ValueError(f"Yearly aggregation total ({yearly_total:.3f}) doesn't match original ({original_total:.3f})")
+    if abs(daily_total - yearly_total) > tolerance:
+        raise ValueError(f"Yearly aggregation total ({yearly_total:.3f}) doesn't match daily total ({daily_total:.3f})")
     
     # Validate multi-year structure
     for level in ['hourly', 'daily', 'weekly', 'monthly', 'seasonal']:
         if 'Year' not in aggregations[level].columns:
             raise ValueError(f"{level} aggregation missing required Year column for multi-year support")
     
-    # Validate year separation - ensure no data mixing across years
-    original_years = set(df_original['Date'].dt.year)
+    # Validate year separation - ensure no data mixing across years.
+    # df_original is sorted by Date, so a year is present iff its [Jan 1, next Jan 1) block is non-empty
+    dates = df_original['Date']
+    candidate_years = range(dates.iloc[0].year, dates.iloc[-1].year + 1)
+    year_starts = pd.to_datetime([f"{year}-01-01" for year in [*candidate_years, candidate_years.stop]])
+    year_bounds = dates.searchsorted(year_starts)
+    original_years = {
+        year for year, first, last in zip(candidate_years, year_bounds[:-1], year_bounds[1:]) if last > first
+    }
     for level in ['daily', 'weekly', 'monthly', 'seasonal', 'yearly']:
         agg_years = set(aggregations[level]['Year'])
         if not agg_years.issubset(original_years):
             raise ValueError(f"{level} aggregation contains years not present in original data")
     
-    days_in_data = (df_original['Date'].max() - df_original['Date'].min()).days + 1
+    # The date span likewise comes from the first and last rows
+    days_in_data = (dates.iloc[-1] - dates.iloc[0]).days + 1
     daily_records = len(aggregations['daily'])
     
     if daily_records > days_in_data:
@@ -236,10 +258,20 @@ def _validate_aggregations(df_original: pd.DataFrame, aggregations: Dict[str, pd
     return True
 
 
-def process_electricity_data(file_path: str) -> tuple[pd.DataFrame, Dict[str, pd.DataFrame]]:
+def process_electricity_data(
+    file_path: str,
+    use_cache: bool = True,
+    validate: bool = True
+) -> tuple[pd.DataFrame, Dict[str, pd.DataFrame]]:
     """
     Complete data processing pipeline with enhanced multi-year aggregation support.
     
+    Args:
+        file_path: Path to the raw CSV export
+        use_cache: Reuse (and refresh) the Parquet cache stored next to the CSV.
+                   The cache is ignored whenever the CSV is newer than it.
+        validate: Run the aggregation consistency checks (skip for trusted inputs)
+    
     Returns:
         tuple: (cleaned_data, primary_aggregations)
             - cleaned_data: Original cleaned dataset
@@ -249,13 +281,44 @@ def process_electricity_data(file_path: str) -> tuple[pd.DataFrame, Dict[str, pd
     Note: Secondary groupings (hour_of_day, day_of_week) are generated dynamically
           using separate functions with date range filtering capabilities.
     """
-    df_raw = _load_raw_data(file_path)
-    df_clean = _clean_raw_data(df_raw)
+    if use_cache:
+        cached = _load_cached_results(file_path, _CACHE_TAG, PRIMARY_LEVELS)
+        if cached is not None:
+            return cached
+    
+    df_clean = _load_clean_data(file_path)
     _validate_cleaned_data(df_clean)
-    aggregations = _aggregate_all_levels(df_clean)
+    aggregations = _aggregate_all_levels(df_clean, validate=validate, use_cache=use_cache)
+    
+    # Results are cached next to the CSV; the temp-directory cache is only written as a
+    # fallback when that location is not writable, so the frames are never stored twice
+    if use_cache and not _save_cached_results(file_path, _CACHE_TAG, df_clean, aggregations):
+        _write_fallback_aggregations(aggregations, _data_fingerprint(df_clean), _CACHE_TAG)
     return df_clean, aggregations
 
 
+def process_electricity_data_chunked(
+    file_path: str,
+    chunksize: int = 100_000,
+    validate: bool = True
+) -> Dict[str, pd.DataFrame]:
+    """
+    Aggregation pipeline for CSVs too large to load at once.
+    
+    The CSV is read and cleaned chunksize rows at a time; each chunk is reduced to
+    per-(Date, Hour) sums and reading counts, from which every level is computed.
+    Peak memory is bounded by the chunk size plus the hourly output, and the cleaned
+    readings are never materialized, so only the aggregations are returned.
+    """
+    df_hourly = _load_hourly_partials(file_path, chunksize)
+    return _aggregate_all_levels(df_hourly, validate=validate, use_cache=False)
+
+
+def clear_cache() -> None:
+    """Drop the in-process results; the Parquet caches are bypassed with use_cache=False instead."""
+    _AGG_CACHE.clear()
+
+
 def get_aggregation_summary(aggregations: Dict[str, pd.DataFrame]) -> Dict[str, Dict]:
     """
     Generate summary information for all primary aggregation levels.
@@ -280,6 +343,38 @@ def get_aggregation_summary(aggregations: Dict[str, pd.DataFrame]) -> Dict[str,
     return summary
 
 
+def _filter_rows(
+    df: pd.DataFrame,
+    start_date: Optional[Union[str, datetime, date]],
+    end_date: Optional[Union[str, datetime, date]],
+    years: Optional[list]
+) -> pd.DataFrame:
+    """
+    Select the rows of an aggregation within the date range and years.
+    
+    When the frame is in Date order the date range is a contiguous block, located
+    by binary search and taken as a positional slice; otherwise it is masked.
+    """
+    if start_date is not None or end_date is not None:
+        dates = df['Date']
+        if dates.is_monotonic_increasing:
+            first = 0 if start_date is None else dates.searchsorted(pd.to_datetime(start_date), side='left')
+            last = len(df) if end_date is None else dates.searchsorted(pd.to_datetime(end_date), side='right')
+            df = df.iloc[first:last]
+        else:
+            keep = np.ones(len(df), dtype=bool)
+            if start_date is not None:
+                keep &= (dates >= pd.to_datetime(start_date)).to_numpy()
+            if end_date is not None:
+                keep &= (dates <= pd.to_datetime(end_date)).to_numpy()
+            df = df[keep]
+    
+    if years is not None:
+        df = df[df['Year'].isin(years).to_numpy()]
+    
+    return df
+
+
 def group_by_hour(
     aggregations: Dict[str, pd.DataFrame], 
     start_date: Optional[Union[str, datetime, date]] = None,
@@ -303,28 +398,15 @@ def group_by_hour(
     if 'hourly' not in aggregations:
         raise ValueError("Hourly aggregation required for hour-of-day analysis")
     
-    df_hourly = aggregations['hourly'].copy()
-    
-    # Apply date range filtering
-    if start_date is not None:
-        start_date = pd.to_datetime(start_date)
-        df_hourly = df_hourly[df_hourly['Date'] >= start_date]
-    
-    if end_date is not None:
-        end_date = pd.to_datetime(end_date)
-        df_hourly = df_hourly[df_hourly['Date'] <= end_date]
-    
-    # Apply year filtering
-    if years is not None:
-        df_hourly = df_hourly[df_hourly['Year'].isin(years)]
+    df_hourly = _filter_rows(aggregations['hourly'], start_date, end_date, years)
     
     if len(df_hourly) == 0:
         raise ValueError("No data available for the specified date range and years")
     
-    # Group by hour of day and calculate average
-    df_result = df_hourly.groupby('Hour')['KWH'].mean().reset_index()
-    df_result.columns = ['Hour', 'Avg_KWH']
-    df_result['Avg_KWH'] = df_result['Avg_KWH'].round(3)
+    # 24 fixed buckets: bincount sums and counts in one pass each, already in Hour order for line plots
+    hours, avg_kwh = _bincount_mean(df_hourly['Hour'].to_numpy(), df_hourly['KWH'].to_numpy(), 24)
+    df_result = pd.DataFrame({'Hour': hours.astype(np.int32), 'Avg_KWH': avg_kwh})
+    _round_consumption(df_result, 'Avg_KWH')
     
     return df_result
 
@@ -352,33 +434,15 @@ def group_by_day_of_week(
     if 'daily' not in aggregations:
         raise ValueError("Daily aggregation required for day-of-week analysis")
     
-    df_daily = aggregations['daily'].copy()
-    
-    # Apply date range filtering
-    if start_date is not None:
-        start_date = pd.to_datetime(start_date)
-        df_daily = df_daily[df_daily['Date'] >= start_date]
-    
-    if end_date is not None:
-        end_date = pd.to_datetime(end_date)
-        df_daily = df_daily[df_daily['Date'] <= end_date]
-    
-    # Apply year filtering
-    if years is not None:
-        df_daily = df_daily[df_daily['Year'].isin(years)]
+    df_daily = _filter_rows(aggregations['daily'], start_date, end_date, years)
     
     if len(df_daily) == 0:
         raise ValueError("No data available for the specified date range and years")
     
-    # Add day of week and group
-    df_daily['DayOfWeekNum'] = df_daily['Date'].dt.dayofweek
-    day_names = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
-    
-    df_result = df_daily.groupby('DayOfWeekNum')['KWH'].mean().reset_index()
-    df_result['DayOfWeek'] = df_result['DayOfWeekNum'].apply(lambda x: day_names[x])
-    df_result = df_result[['DayOfWeek', 'KWH']]
-    df_result.columns = ['DayOfWeek', 'Avg_KWH']
-    df_result['Avg_KWH'] = df_result['Avg_KWH'].round(3)
+    # Average per day-of-week number (0 = Monday) over 7 fixed buckets, then name the days present
+    day_numbers, avg_kwh = _bincount_mean(df_daily['Date'].dt.dayofweek.to_numpy(), df_daily['KWH'].to_numpy(), 7)
+    df_result = pd.DataFrame({'DayOfWeek': _DAY_NAMES[day_numbers], 'Avg_KWH': avg_kwh})
+    _round_consumption(df_result, 'Avg_KWH')
     
     return df_result
 
@@ -1,6 +1,7 @@
 
+from functools import partial
 import pandas as pd
-from typing import Dict, Optional, Union
+from typing import Callable, Dict, Optional, Union
 import numpy as np
 import matplotlib.pyplot as plt
 import matplotlib.dates as mdates
@@ -8,45 +9,69 @@ from datetime import datetime, date
 import seaborn as sns
 
 
+# Fixed display order of categorical bar charts, as label -> position lookups
+_SEASON_ORDER = ['Winter', 'Spring', 'Summer', 'Autumn']
+_DAY_ORDER = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+_SEASON_POSITION = {season: i for i, season in enumerate(_SEASON_ORDER)}
+_DAY_POSITION = {day: i for i, day in enumerate(_DAY_ORDER)}
+
+# (x column, y column, x label, y label) per aggregation level
+_PLOT_COLUMNS = {
+    "hourly": ("Date", "KWH", "Date", "Consumption (kWh)"),
+    "daily": ("Date", "KWH", "Date", "Consumption (kWh)"),
+    "weekly": ("Week", "KWH", "Week", "Consumption (kWh)"),
+    "monthly": ("Month", "KWH", "Month", "Consumption (kWh)"),
+    "seasonal": ("Season", "KWH", "Season", "Consumption (kWh)"),
+    "yearly": ("Year", "KWH", "Year", "Consumption (kWh)"),
+    "hour_of_day": ("Hour", "Avg_KWH", "Hour of Day", "Average Consumption (kWh)"),
+    "day_of_week": ("DayOfWeek", "Avg_KWH", "Day of Week", "Average Consumption (kWh)"),
+}
+
+_CHART_KINDS = ["line", "bar", "scatter", "box"]
+
+# Figure shared by visualize(reuse=True) calls; created on first use
+_FIG: Optional[plt.Figure] = None
+_AX: Optional[plt.Axes] = None
+
+# Columns a frame needs to be plotted at each level
+_LEVEL_COLUMNS = {
+    "hour_of_day": frozenset({"Hour", "Avg_KWH"}),
+    "day_of_week": frozenset({"DayOfWeek", "Avg_KWH"}),
+    "hourly": frozenset({"Date", "KWH"}),
+    "daily": frozenset({"Date", "KWH"}),
+    "weekly": frozenset({"Week", "KWH"}),
+    "monthly": frozenset({"Month", "KWH"}),
+    "seasonal": frozenset({"Season", "KWH"}),
+    "yearly": frozenset({"Year", "KWH"}),
+}
+
+# Auto-detection order: the first signature contained in the columns wins.
+# Yearly frames are only recognized when they have no other columns.
+_LEVEL_SIGNATURES = [
+    (frozenset({"Hour", "Avg_KWH"}), "hour_of_day"),
+    (frozenset({"DayOfWeek", "Avg_KWH"}), "day_of_week"),
+    (frozenset({"Date", "KWH", "Year", "Hour"}), "hourly"),
+    (frozenset({"Date", "KWH", "Year"}), "daily"),
+    (frozenset({"Week", "KWH"}), "weekly"),
+    (frozenset({"Month", "KWH"}), "monthly"),
+    (frozenset({"Season", "KWH"}), "seasonal"),
+]
+
 
 def _auto_detect_level(df: pd.DataFrame, level: str) -> str:
     """Auto-detect or validate the aggregation level based on DataFrame columns."""
-    columns = df.columns.tolist()
+    columns = frozenset(df.columns)
     
     # Check if the provided level matches the DataFrame structure
-    if level == "hour_of_day" and "Hour" in columns and "Avg_KWH" in columns:
-        return level
-    elif level == "day_of_week" and "DayOfWeek" in columns and "Avg_KWH" in columns:
-        return level
-    elif level in ["hourly", "daily"] and "Date" in columns and "KWH" in columns:
-        return level
-    elif level == "weekly" and "Week" in columns and "KWH" in columns:
-        return level
-    elif level == "monthly" and "Month" in columns and "KWH" in columns:
-        return level
-    elif level == "seasonal" and "Season" in columns and "KWH" in columns:
-        return level
-    elif level == "yearly" and "Year" in columns and "KWH" in columns:
+    required = _LEVEL_COLUMNS.get(level)
+    if required is not None and required <= columns:
         return level
     
     # Auto-detect based on columns if the provided level doesn't match
-    if "Hour" in columns and "Avg_KWH" in columns:
-        return "hour_of_day"
-    elif "DayOfWeek" in columns and "Avg_KWH" in columns:
-        return "day_of_week"
-    elif "Date" in columns and "KWH" in columns and "Year" in columns:
-        # Distinguish between hourly and daily based on presence of Hour column
-        if "Hour" in columns:
-            return "hourly"
-        else:
-            return "daily"
-    elif "Week" in columns and "KWH" in columns:
-        return "weekly"
-    elif "Month" in columns and "KWH" in columns:
-        return "monthly"
-    elif "Season" in columns and "KWH" in columns:
-        return "seasonal"
-    elif "Year" in columns and "KWH" in columns and len(columns) == 2:
+    for signature, detected_level in _LEVEL_SIGNATURES:
+        if signature <= columns:
+            return detected_level
+    if columns == _LEVEL_COLUMNS["yearly"]:
         return "yearly"
     
     # If no match found, return the original level (let other functions handle the error)
@@ -61,7 +86,8 @@ def visualize(
     end: Optional[Union[str, date, datetime]] = None,
     group_by: Optional[str] = None,
     title: Optional[str] = None,
-    show: bool = True
+    show: bool = True,
+    reuse: bool = False
 ) -> Optional[plt.Figure]:
     """
     Display electricity consumption data for a given aggregation level and time range.
@@ -75,6 +101,8 @@ def visualize(
         group_by (str): For grouped visualizations ("month", "season", "day_of_week", etc.).
         title (str): Custom plot title (optional).
         show (bool): Whether to display the plot immediately or just return the figure object.
+        reuse (bool): Redraw into one shared figure instead of creating a new one per call
+            (for dashboards plotting repeatedly; a returned figure is overwritten by the next call).
     
     Returns:
         matplotlib.figure.Figure: Figure object if show=False, otherwise None.
@@ -85,16 +113,13 @@ def visualize(
     sns.set_palette("husl")
     
     # Create figure and axis
-    fig, ax = plt.subplots(figsize=(12, 6))
-    
-    # Make a copy of the dataframe to avoid modifying original
-    df_plot = df.copy()
+    fig, ax = _get_figure(reuse)
     
     # Auto-detect level if not specified correctly or if columns don't match
-    level = _auto_detect_level(df_plot, level)
+    level = _auto_detect_level(df, level)
     
-    # Filter data by date range if provided
-    df_plot = _filter_by_date_range(df_plot, level, start, end)
+    # Filter data by date range if provided; filtering never modifies the caller's frame
+    df_plot = _filter_by_date_range(df, level, start, end)
     
     # Determine x and y columns based on aggregation level
     x_col, y_col, x_label, y_label = _get_plot_columns(df_plot, level)
@@ -103,17 +128,12 @@ def visualize(
     if title is None:
         title = f"Electricity Consumption - {level.replace('_', ' ').title()}"
     
-    # Handle different chart types
-    if kind == "line":
-        _plot_line_chart(ax, df_plot, x_col, y_col, level)
-    elif kind == "bar":
-        _plot_bar_chart(ax, df_plot, x_col, y_col, level)
-    elif kind == "scatter":
-        _plot_scatter_chart(ax, df_plot, x_col, y_col)
-    elif kind == "box":
-        _plot_box_chart(ax, df_plot, level, group_by)
+    # Plotters for the known levels are bound once at import; other levels are bound per call
+    plot = _VIS_DISPATCH.get((level, kind)) or _make_plotter(level, kind, x_col, y_col)
+    if kind == "box":
+        plot(ax, df_plot, group_by=group_by)
     else:
-        raise ValueError(f"Unsupported chart type: {kind}")
+        plot(ax, df_plot)
     
     # Set labels and title
     ax.set_xlabel(x_label)
@@ -134,6 +154,23 @@ def visualize(
         return fig
 
 
+def _get_figure(reuse: bool) -> tuple:
+    """Return a new (figure, axes) pair, or the cleared shared pair when reuse is requested."""
+    global _FIG, _AX
+    if not reuse:
+        return plt.subplots(figsize=(12, 6))
+    
+    # Recreate the shared figure if it was never made or has been closed
+    if _FIG is None or not plt.fignum_exists(_FIG.number):
+        _FIG, _AX = plt.subplots(figsize=(12, 6))
+    else:
+        _AX.cla()
+        _FIG.set_size_inches(12, 6)
+        # Make it current: tick rotation and tight_layout go through pyplot
+        plt.figure(_FIG.number)
+    return _FIG, _AX
+
+
 def _filter_by_date_range(
     df: pd.DataFrame, 
     level: str, 
@@ -144,103 +181,63 @@ def _filter_by_date_range(
     if start is None and end is None:
         return df
     
-    df_filtered = df.copy()
-    
     # Convert string dates to datetime
     if start is not None and isinstance(start, str):
         start = pd.to_datetime(start)
     if end is not None and isinstance(end, str):
         end = pd.to_datetime(end)
     
-    # For aggregated data like hour_of_day and day_of_week, 
-    # date filtering doesn't make sense since they don't contain date information
-    # Return the original dataframe for these cases
-    if level in ["hour_of_day", "day_of_week"]:
-        # These aggregations don't have date columns, so return original data
-        # but we can still apply hour filtering for hour_of_day if needed
-        if level == "hour_of_day" and (start is not None or end is not None):
-            # Extract hour from start/end times for filtering
-            if start is not None:
-                start_hour = start.hour
-                df_filtered = df_filtered[df_filtered["Hour"] >= start_hour]
-            if end is not None:
-                end_hour = end.hour
-                df_filtered = df_filtered[df_filtered["Hour"] <= end_hour]
-        return df_filtered
+    # Conditions are combined into one mask, so at most one new frame is built
+    keep = np.ones(len(df), dtype=bool)
     
     # Apply filtering based on aggregation level - now with Year column support
     if level in ["hourly", "daily"] and "Date" in df.columns:
+        dates = df["Date"]
+        # Date-ordered aggregations take the range as a positional slice found by binary search
+        if dates.is_monotonic_increasing:
+            first = 0 if start is None else dates.searchsorted(pd.Timestamp(start), side='left')
+            last = len(dates) if end is None else dates.searchsorted(pd.Timestamp(end), side='right')
+            return df.iloc[first:last]
+        if start is not None:
+            keep &= (dates >= pd.Timestamp(start)).to_numpy()
+        if end is not None:
+            keep &= (dates <= pd.Timestamp(end)).to_numpy()
+    
+    # For aggregated data like hour_of_day and day_of_week, 
+    # date filtering doesn't make sense since they don't contain date information
+    elif level == "hour_of_day":
+        # We can still apply hour filtering, using the hour of the start/end times
         if start is not None:
-            df_filtered = df_filtered[df_filtered["Date"] >= start]
+            keep &= (df["Hour"] >= start.hour).to_numpy()
         if end is not None:
-            df_filtered = df_filtered[df_filtered["Date"] <= end]
+            keep &= (df["Hour"] <= end.hour).to_numpy()
     elif level in ["monthly", "yearly", "weekly", "seasonal"] and "Year" in df.columns:
+        years = df["Year"].to_numpy()
         if start is not None:
-            df_filtered = df_filtered[df_filtered["Year"] >= start.year]
+            keep &= years >= start.year
         if end is not None:
-            df_filtered = df_filtered[df_filtered["Year"] <= end.year]
+            keep &= years <= end.year
         # Additional month filtering for monthly data
         if level == "monthly" and "Month" in df.columns:
+            months = df["Month"].to_numpy()
             if start is not None:
-                df_filtered = df_filtered[
-                    (df_filtered["Year"] > start.year) | 
-                    ((df_filtered["Year"] == start.year) & (df_filtered["Month"] >= start.month))
-                ]
+                keep &= (years > start.year) | ((years == start.year) & (months >= start.month))
             if end is not None:
-                df_filtered = df_filtered[
-                    (df_filtered["Year"] < end.year) | 
-                    ((df_filtered["Year"] == end.year) & (df_filtered["Month"] <= end.month))
-                ]
+                keep &= (years < end.year) | ((years == end.year) & (months <= end.month))
     
-    return df_filtered
+    # Unfiltered levels (e.g. day_of_week) pass through without a copy
+    return df if keep.all() else df[keep]
 
 
 def _get_plot_columns(df: pd.DataFrame, level: str) -> tuple:
     """Determine x and y columns and labels based on aggregation level."""
+    if level in _PLOT_COLUMNS:
+        return _PLOT_COLUMNS[level]
     
-    if level in ["hourly", "daily"]:
-        x_col = "Date"
-        y_col = "KWH"
-        x_label = "Date"
-        y_label = "Consumption (kWh)"
-    elif level == "weekly":
-        x_col = "Week"
-        y_col = "KWH"
-        x_label = "Week"
-        y_label = "Consumption (kWh)"
-    elif level == "monthly":
-        x_col = "Month"
-        y_col = "KWH"
-        x_label = "Month"
-        y_label = "Consumption (kWh)"
-    elif level == "seasonal":
-        x_col = "Season"
-        y_col = "KWH"
-        x_label = "Season"
-        y_label = "Consumption (kWh)"
-    elif level == "yearly":
-        x_col = "Year"
-        y_col = "KWH"
-        x_label = "Year"
-        y_label = "Consumption (kWh)"
-    elif level == "hour_of_day":
-        x_col = "Hour"
-        y_col = "Avg_KWH"
-        x_label = "Hour of Day"
-        y_label = "Average Consumption (kWh)"
-    elif level == "day_of_week":
-        x_col = "DayOfWeek"
-        y_col = "Avg_KWH"
-        x_label = "Day of Week"
-        y_label = "Average Consumption (kWh)"
-    else:
-        # Default fallback
-        x_col = df.columns[0]
-        y_col = df.columns[-1]
-        x_label = x_col
-        y_label = y_col
-    
-    return x_col, y_col, x_label, y_label
+    # Default fallback
+    x_col = df.columns[0]
+    y_col = df.columns[-1]
+    return x_col, y_col, x_col, y_col
 
 
 def _plot_line_chart(ax: plt.Axes, df: pd.DataFrame, x_col: str, y_col: str, level: str):
@@ -255,23 +252,16 @@ def _plot_line_chart(ax: plt.Axes, df: pd.DataFrame, x_col: str, y_col: str, lev
 
 def _plot_bar_chart(ax: plt.Axes, df: pd.DataFrame, x_col: str, y_col: str, level: str):
     """Create a bar chart."""
-    if level == "seasonal":
-        # Custom order for seasons - handle potential duplicates
-        season_order = ['Winter', 'Spring', 'Summer', 'Autumn']
-        # Create a categorical type to maintain order without reindexing
-        df_plot = df.copy()
-        df_plot[x_col] = pd.Categorical(df_plot[x_col], categories=season_order, ordered=True)
-        df_plot = df_plot.sort_values(x_col)
-        ax.bar(df_plot[x_col], df_plot[y_col], alpha=0.8)
-    elif level == "day_of_week":
-        # Custom order for days of week
-        day_order = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
-        df_plot = df.copy()
-        df_plot[x_col] = pd.Categorical(df_plot[x_col], categories=day_order, ordered=True)
-        df_plot = df_plot.sort_values(x_col)
-        ax.bar(df_plot[x_col], df_plot[y_col], alpha=0.8)
-        # Rotate x-axis labels for better readability
-        plt.xticks(rotation=45)
+    if level in ["seasonal", "day_of_week"]:
+        # Custom order for seasons/days - handle potential duplicates (multi-year seasons);
+        # unknown labels go last
+        positions = _SEASON_POSITION if level == "seasonal" else _DAY_POSITION
+        x_values = df[x_col].to_numpy()
+        order = np.argsort([positions.get(x, len(positions)) for x in x_values], kind='stable')
+        ax.bar(x_values[order], df[y_col].to_numpy()[order], alpha=0.8)
+        if level == "day_of_week":
+            # Rotate x-axis labels for better readability
+            plt.xticks(rotation=45)
     else:
         ax.bar(df[x_col], df[y_col], alpha=0.8)
 
@@ -325,4 +315,24 @@ def _format_plot(ax: plt.Axes, level: str, kind: str):
     
     # Remove top and right spines for cleaner look
     ax.spines['top'].set_visible(False)
-    ax.spines['right'].set_visible(False)
\ No newline at end of file
+    ax.spines['right'].set_visible(False)
+
+
+def _make_plotter(level: str, kind: str, x_col: str, y_col: str) -> Callable:
+    """Bind the chart function of a chart type to the columns and level it plots."""
+    if kind == "line":
+        return partial(_plot_line_chart, x_col=x_col, y_col=y_col, level=level)
+    elif kind == "bar":
+        return partial(_plot_bar_chart, x_col=x_col, y_col=y_col, level=level)
+    elif kind == "scatter":
+        return partial(_plot_scatter_chart, x_col=x_col, y_col=y_col)
+    elif kind == "box":
+        return partial(_plot_box_chart, level=level)
+    raise ValueError(f"Unsupported chart type: {kind}")
+
+
+_VIS_DISPATCH = {
+    (level, kind): _make_plotter(level, kind, x_col, y_col)
+    for level, (x_col, y_col, _, _) in _PLOT_COLUMNS.items()
+    for kind in _CHART_KINDS
+}